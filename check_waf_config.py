@@ -4,9 +4,155 @@ import requests
 import json
 import sys
 import re
+import io
+import os
+import mmap
 import argparse
+import itertools
 from termcolor import colored
 
+try:
+    import ijson
+except ImportError:  # optional: stream-parse rules files when available
+    ijson = None
+
+try:
+    import orjson
+    _loads = orjson.loads
+except ImportError:  # optional: faster JSON parsing when available
+    _loads = json.loads
+
+_JSON_ERRORS = (json.JSONDecodeError, ijson.JSONError) if ijson else (json.JSONDecodeError,)
+
+# Shared session so the connectivity probe and the WAF check reuse one connection
+_SESSION = requests.Session()
+
+# Comment-stripping reader states
+_NORMAL, _STRING, _ESCAPE, _SLASH, _LINE_COMMENT, _BLOCK_COMMENT, _BLOCK_STAR = range(7)
+
+# Next byte that can change the state, for the states that scan ahead
+_NEXT_RE = {
+    _NORMAL: re.compile(rb'["/]'),
+    _STRING: re.compile(rb'["\\]'),
+    _LINE_COMMENT: re.compile(rb'\n'),
+    _BLOCK_COMMENT: re.compile(rb'\*'),
+}
+
+class _CommentStrippingReader(io.RawIOBase):
+    """Binary reader that drops // and /* */ comments outside JSON strings.
+
+    The underlying file is processed in blocks, carrying the state across
+    block boundaries, so the stripped content is never held in memory at once.
+    """
+
+    def __init__(self, raw, block_size=64 * 1024):
+        self._raw = raw
+        self._block_size = block_size
+        self._state = _NORMAL
+        self._pending = b''
+        self._offset = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, b):
+        while self._offset >= len(self._pending):
+            block = self._raw.read(self._block_size)
+            if not block:
+                if self._state != _SLASH:
+                    return 0
+                # A lone '/' at the very end of the file is not a comment
+                self._state = _NORMAL
+                block_out = b'/'
+            else:
+                block_out = self._strip(block)
+            self._pending, self._offset = block_out, 0
+        n = min(len(b), len(self._pending) - self._offset)
+        b[:n] = self._pending[self._offset:self._offset + n]
+        self._offset += n
+        return n
+
+    def _strip(self, block):
+        """Return the non-comment bytes of block, advancing the state."""
+        out = bytearray()
+        state = self._state
+        i, n = 0, len(block)
+        while i < n:
+            if state == _ESCAPE:
+                out.append(block[i])
+                state = _STRING
+                i += 1
+                continue
+            if state == _SLASH:
+                c = block[i]
+                if c == 0x2F:  # '/'
+                    state = _LINE_COMMENT
+                    i += 1
+                elif c == 0x2A:  # '*'
+                    state = _BLOCK_COMMENT
+                    i += 1
+                else:
+                    out.append(0x2F)
+                    state = _NORMAL
+                continue
+            if state == _BLOCK_STAR:
+                c = block[i]
+                if c == 0x2F:
+                    state = _NORMAL
+                elif c != 0x2A:
+                    state = _BLOCK_COMMENT
+                i += 1
+                continue
+
+            m = _NEXT_RE[state].search(block, i)
+            if m is None:
+                if state in (_NORMAL, _STRING):
+                    out += block[i:]
+                break
+            j = m.start()
+            c = block[j]
+            if state == _NORMAL:
+                out += block[i:j]
+                if c == 0x22:  # '"'
+                    out.append(c)
+                    state = _STRING
+                else:
+                    state = _SLASH
+            elif state == _STRING:
+                out += block[i:j + 1]
+                state = _ESCAPE if c == 0x5C else _NORMAL  # '\\'
+            elif state == _LINE_COMMENT:
+                # Keep the newline itself
+                state = _NORMAL
+                i = j
+                continue
+            else:
+                state = _BLOCK_STAR
+            i = j + 1
+        self._state = state
+        return bytes(out)
+
+# (target, pattern keyword, required test key, display label) for score rules
+_CHECKS = (
+    ('URL_PARAM:test', 'low_score_test', 'low_score_test', 'test=low_score_test'),
+    ('URL_PARAM:param1', 'score2', 'param1_score2', 'param1=score2'),
+    ('URL_PARAM:param2', 'score2', 'param2_score2', 'param2=score2'),
+    ('URL_PARAM:param1', 'score3', 'param1_score3', 'param1=score3'),
+    ('URL_PARAM:param2', 'score3', 'param2_score3', 'param2=score3'),
+    ('URL_PARAM:increment', 'score1', 'increment_score1', 'increment=score1'),
+    ('URL_PARAM:increment', 'score2', 'increment_score2', 'increment=score2'),
+    ('URL_PARAM:increment', 'score3', 'increment_score3', 'increment=score3'),
+)
+
+# (target, pattern keyword) -> (check order, required test key, display label)
+_DISPATCH = {(target, keyword): (i, test_key, label) for i, (target, keyword, test_key, label) in enumerate(_CHECKS)}
+
+# All pattern keywords of interest in one alternation, so a rule pattern is
+# scanned once regardless of how many keywords are checked. The alternation
+# sits in a lookahead so findall tries every position and also reports
+# keywords that overlap, e.g. 'true' inside 'low_score_testrue'.
+_KEYWORD_RE = re.compile('(?=(' + '|'.join(re.escape(kw) for kw in sorted({c[1] for c in _CHECKS} | {'true'})) + '))')
+
 def setup_args():
     parser = argparse.ArgumentParser(description='Check WAF configuration for testing')
     parser.add_argument('--url', default='http://localhost:8080', help='URL to test (default: http://localhost:8080)')
@@ -14,22 +160,59 @@ def setup_args():
     parser.add_argument('--rules-file', default='sample_rules.json', help='Path to rules file (default: sample_rules.json)')
     return parser.parse_args()
 
+def iter_rules(file_path):
+    """Yield rules from a JSON file one at a time, stripping comments if present."""
+    with open(file_path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            # mmap cannot map an empty file; let the parser report it
+            yield from _parse_rules(f)
+            return
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            # find() searches the mapping in C without copying the file; most
+            # files have no comments and skip the stripping reader entirely
+            has_comments = mm.find(b'//') != -1 or mm.find(b'/*') != -1
+            yield from _parse_rules(_CommentStrippingReader(mm) if has_comments else mm)
+
+class _FirstByteRecorder:
+    """Pass-through reader that remembers the first non-whitespace byte read."""
+
+    def __init__(self, source):
+        self._source = source
+        self.first = None
+
+    def read(self, size=-1):
+        data = self._source.read(size)
+        if self.first is None:
+            stripped = data.lstrip()
+            if stripped:
+                self.first = stripped[:1]
+        return data
+
+def _not_a_rule_list():
+    return json.JSONDecodeError("Expected a JSON array of rules at the top level", "", 0)
+
+def _parse_rules(source):
+    """Yield rules parsed from a binary file-like source holding a JSON array."""
+    if ijson:
+        # items() silently yields nothing for a top-level object, so check
+        # what the document started with once it has been parsed
+        recorder = _FirstByteRecorder(source)
+        yield from ijson.items(recorder, 'item', use_float=True)
+        if recorder.first != b'[':
+            raise _not_a_rule_list()
+    else:
+        rules = _loads(source.read())
+        if not isinstance(rules, list):
+            raise _not_a_rule_list()
+        yield from rules
+
 def load_rules_from_file(file_path):
     """Load rules from a JSON file, handling comments if present."""
     try:
-        # Read the file content
-        with open(file_path, 'r') as f:
-            content = f.read()
-        
-        # Remove JavaScript-style comments if present
-        content = re.sub(r'//.*?\n', '\n', content)  # Remove single-line comments
-        content = re.sub(r'/\*.*?\*/', '', content, flags=re.DOTALL)  # Remove multi-line comments
-        
-        # Parse JSON
-        rules = json.loads(content)
+        rules = list(iter_rules(file_path))
         print(colored(f"Loaded {len(rules)} rules from {file_path}", "green"))
         return rules
-    except json.JSONDecodeError as e:
+    except _JSON_ERRORS as e:
         print(colored(f"Error parsing JSON from {file_path}: {str(e)}", "red"))
         print(colored("Make sure the file is valid JSON. JavaScript-style comments are stripped automatically.", "yellow"))
         return []
@@ -64,126 +247,87 @@ def check_rule_coverage(rules, threshold=5):
     }
     
     block_rule_mode = None
+    found = 0  # number of required tests covered so far
+    out = []  # output lines, written in one go at the end
     
     for rule in rules:
-        # Check for low score test rule
-        if 'targets' in rule and 'URL_PARAM:test' in rule['targets'] and 'pattern' in rule and 'low_score_test' in rule['pattern']:
-            required_tests["low_score_test"] = True
-            print(colored(f"✓ Found rule for test=low_score_test (ID: {rule.get('id', 'unknown')})", "green"))
-            if 'score' in rule:
-                rule_scores["low_score_test"] = rule.get('score', 0)
-                print(colored(f"  Score: {rule['score']}", "yellow"))
-        
-        # Check for param1 score2
-        if 'targets' in rule and 'URL_PARAM:param1' in rule['targets'] and 'pattern' in rule and 'score2' in rule['pattern']:
-            required_tests["param1_score2"] = True
-            print(colored(f"✓ Found rule for param1=score2 (ID: {rule.get('id', 'unknown')})", "green"))
-            if 'score' in rule:
-                rule_scores["param1_score2"] = rule.get('score', 0)
-                print(colored(f"  Score: {rule['score']}", "yellow"))
-        
-        # Check for param2 score2
-        if 'targets' in rule and 'URL_PARAM:param2' in rule['targets'] and 'pattern' in rule and 'score2' in rule['pattern']:
-            required_tests["param2_score2"] = True
-            print(colored(f"✓ Found rule for param2=score2 (ID: {rule.get('id', 'unknown')})", "green"))
-            if 'score' in rule:
-                rule_scores["param2_score2"] = rule.get('score', 0)
-                print(colored(f"  Score: {rule['score']}", "yellow"))
-        
-        # Check for param1 score3
-        if 'targets' in rule and 'URL_PARAM:param1' in rule['targets'] and 'pattern' in rule and 'score3' in rule['pattern']:
-            required_tests["param1_score3"] = True
-            print(colored(f"✓ Found rule for param1=score3 (ID: {rule.get('id', 'unknown')})", "green"))
-            if 'score' in rule:
-                rule_scores["param1_score3"] = rule.get('score', 0)
-                print(colored(f"  Score: {rule['score']}", "yellow"))
+        # Targets are a list in the rule schema; hash them once for the checks below
+        targets = rule.get('targets')
+        targets = frozenset(targets) if isinstance(targets, (list, tuple)) else frozenset((targets,) if targets else ())
+        hits = set(_KEYWORD_RE.findall(rule.get('pattern') or ''))
         
-        # Check for param2 score3
-        if 'targets' in rule and 'URL_PARAM:param2' in rule['targets'] and 'pattern' in rule and 'score3' in rule['pattern']:
-            required_tests["param2_score3"] = True
-            print(colored(f"✓ Found rule for param2=score3 (ID: {rule.get('id', 'unknown')})", "green"))
+        # Check score-contributing test rules, reported in table order
+        matches = sorted(_DISPATCH[key] for key in itertools.product(targets, hits) if key in _DISPATCH)
+        for _, test_key, label in matches:
+            found += not required_tests[test_key]
+            required_tests[test_key] = True
+            out.append(colored(f"✓ Found rule for {label} (ID: {rule.get('id', 'unknown')})", "green"))
             if 'score' in rule:
-                rule_scores["param2_score3"] = rule.get('score', 0)
-                print(colored(f"  Score: {rule['score']}", "yellow"))
+                rule_scores[test_key] = rule['score']
+                out.append(colored(f"  Score: {rule['score']}", "yellow"))
         
         # Check for block action
-        if 'targets' in rule and 'URL_PARAM:block' in rule['targets'] and 'pattern' in rule and 'true' in rule['pattern']:
+        if 'URL_PARAM:block' in targets and 'true' in hits:
+            found += not required_tests["block_true"]
             required_tests["block_true"] = True
             block_rule_mode = rule.get('mode', 'unknown')
-            print(colored(f"✓ Found rule for block=true (ID: {rule.get('id', 'unknown')})", "green"))
-            print(colored(f"  Action: {block_rule_mode}", "yellow"))
+            out.append(colored(f"✓ Found rule for block=true (ID: {rule.get('id', 'unknown')})", "green"))
+            out.append(colored(f"  Action: {block_rule_mode}", "yellow"))
             if block_rule_mode != 'block':
-                print(colored("  WARNING: This rule should have mode='block'", "red"))
+                out.append(colored("  WARNING: This rule should have mode='block'", "red"))
         
-        # Check for increment score rules
-        if 'targets' in rule and 'URL_PARAM:increment' in rule['targets']:
-            if 'pattern' in rule and 'score1' in rule['pattern']:
-                required_tests["increment_score1"] = True
-                rule_scores["increment_score1"] = rule.get('score', 0)
-                print(colored(f"✓ Found rule for increment=score1 (ID: {rule.get('id', 'unknown')})", "green"))
-                if 'score' in rule:
-                    print(colored(f"  Score: {rule['score']}", "yellow"))
-            
-            if 'pattern' in rule and 'score2' in rule['pattern']:
-                required_tests["increment_score2"] = True
-                rule_scores["increment_score2"] = rule.get('score', 0)
-                print(colored(f"✓ Found rule for increment=score2 (ID: {rule.get('id', 'unknown')})", "green"))
-                if 'score' in rule:
-                    print(colored(f"  Score: {rule['score']}", "yellow"))
-            
-            if 'pattern' in rule and 'score3' in rule['pattern']:
-                required_tests["increment_score3"] = True
-                rule_scores["increment_score3"] = rule.get('score', 0)
-                print(colored(f"✓ Found rule for increment=score3 (ID: {rule.get('id', 'unknown')})", "green"))
-                if 'score' in rule:
-                    print(colored(f"  Score: {rule['score']}", "yellow"))
+        # Stop scanning once every required test has a matching rule
+        if found == len(required_tests) and block_rule_mode is not None:
+            break
     
     # Check test coverage
     missing_tests = [test.replace('_', '=') for test, found in required_tests.items() if not found]
     if missing_tests:
-        print(colored(f"\n⚠ Missing rules for: {', '.join(missing_tests)}", "red"))
+        out.append(colored(f"\n⚠ Missing rules for: {', '.join(missing_tests)}", "red"))
     else:
-        print(colored("\n✓ All required test rules are present!", "green"))
+        out.append(colored("\n✓ All required test rules are present!", "green"))
     
     # Validate expected scores for key test combinations
-    print(colored("\nCalculated Scores for Key Test Combinations:", "cyan"))
+    out.append(colored("\nCalculated Scores for Key Test Combinations:", "cyan"))
     
     # Test 2: Below threshold
     test2_score = rule_scores["param1_score2"] + rule_scores["param2_score2"]
     test2_should_block = test2_score >= threshold
     
     if required_tests["param1_score2"] and required_tests["param2_score2"]:
-        print(colored(f"Test 2 - param1=score2&param2=score2: Score = {test2_score}", "yellow"))
-        print(colored(f"  Threshold: {threshold}, Should Block: {'Yes' if test2_should_block else 'No'}", 
+        out.append(colored(f"Test 2 - param1=score2&param2=score2: Score = {test2_score}", "yellow"))
+        out.append(colored(f"  Threshold: {threshold}, Should Block: {'Yes' if test2_should_block else 'No'}", 
                      "red" if test2_should_block else "green"))
         if test2_should_block:
-            print(colored("  WARNING: This test should pass (not block) but the score may trigger blocking", "red"))
+            out.append(colored("  WARNING: This test should pass (not block) but the score may trigger blocking", "red"))
     else:
-        print(colored("Test 2 - param1=score2&param2=score2: Cannot calculate - missing rules", "red"))
+        out.append(colored("Test 2 - param1=score2&param2=score2: Cannot calculate - missing rules", "red"))
     
     # Test 3: Exceeds threshold
     test3_score = rule_scores["param1_score3"] + rule_scores["param2_score3"]
     test3_should_block = test3_score >= threshold
     
     if required_tests["param1_score3"] and required_tests["param2_score3"]:
-        print(colored(f"Test 3 - param1=score3&param2=score3: Score = {test3_score}", "yellow"))
-        print(colored(f"  Threshold: {threshold}, Should Block: {'Yes' if test3_should_block else 'No'}", 
+        out.append(colored(f"Test 3 - param1=score3&param2=score3: Score = {test3_score}", "yellow"))
+        out.append(colored(f"  Threshold: {threshold}, Should Block: {'Yes' if test3_should_block else 'No'}", 
                      "green" if test3_should_block else "red"))
         if not test3_should_block:
-            print(colored("  WARNING: This test should be blocked but the score is below threshold", "red"))
+            out.append(colored("  WARNING: This test should be blocked but the score is below threshold", "red"))
     else:
-        print(colored("Test 3 - param1=score3&param2=score3: Cannot calculate - missing rules", "red"))
+        out.append(colored("Test 3 - param1=score3&param2=score3: Cannot calculate - missing rules", "red"))
     
     # Test 4: Block action
     if required_tests["block_true"]:
         block_should_work = block_rule_mode == 'block'
-        print(colored(f"Test 4 - block=true: Mode = {block_rule_mode}", "yellow"))
-        print(colored(f"  Should Block: {'Yes' if block_should_work else 'No'}", 
+        out.append(colored(f"Test 4 - block=true: Mode = {block_rule_mode}", "yellow"))
+        out.append(colored(f"  Should Block: {'Yes' if block_should_work else 'No'}", 
                      "green" if block_should_work else "red"))
         if not block_should_work:
-            print(colored("  WARNING: This rule should have mode='block' to properly test blocking", "red"))
+            out.append(colored("  WARNING: This rule should have mode='block' to properly test blocking", "red"))
     else:
-        print(colored("Test 4 - block=true: Cannot evaluate - missing rule", "red"))
+        out.append(colored("Test 4 - block=true: Cannot evaluate - missing rule", "red"))
+    
+    sys.stdout.write(''.join(line + '\n' for line in out))
     
     return required_tests, missing_tests, {
         "test2_score": test2_score if required_tests["param1_score2"] and required_tests["param2_score2"] else None,
@@ -199,7 +343,8 @@ def check_waf_active(url):
     
     try:
         print(colored(f"\nSending test request to {url} with block=true", "blue"))
-        response = requests.get(url, params=block_payload, timeout=5)
+        # HEAD is enough to see the WAF's 403; (connect, read) timeouts fail fast
+        response = _SESSION.head(url, params=block_payload, timeout=(1, 2), allow_redirects=False)
         
         if response.status_code == 403:
             print(colored("✓ WAF appears to be active (blocked request as expected)", "green"))
@@ -223,7 +368,7 @@ def main():
     
     # Check server connectivity
     try:
-        response = requests.get(base_url, timeout=2)
+        _SESSION.head(base_url, timeout=(1, 1))
         print(colored(f"✓ Server is reachable at {base_url}", "green"))
     except requests.exceptions.RequestException:
         print(colored(f"⚠ Cannot reach server at {base_url}", "red"))
@@ -5,6 +5,11 @@ import json
 import sys
 import argparse
 from termcolor import colored
+from waf_tests import TEST_CASES, make_session, run_tests
+
+_SUMMARY_FMT = "{name}: {status} (Expected: {expected}, Actual: {actual})"
+
+_SESSION = make_session('WAF-Threshold-Test-Debug/1.0')
 
 def setup_args():
     parser = argparse.ArgumentParser(description='Debug WAF test result evaluation')
@@ -12,107 +17,80 @@ def setup_args():
     parser.add_argument('--detailed', action='store_true', help='Show detailed request/response information')
     return parser.parse_args()
 
-def debug_response_evaluation(url, test_name, payload, expected_status):
-    """Send a request and debug the response evaluation logic."""
-    print(colored(f"\n=== Debugging {test_name} ===", "cyan"))
-    print(colored(f"URL: {url}", "yellow"))
-    print(colored(f"Payload: {payload}", "yellow"))
-    print(colored(f"Expected status: {expected_status}", "yellow"))
+def print_evaluation(url, result, detailed=False):
+    """Print the debug details of a single evaluated request in one write."""
+    sys.stdout.write(''.join(line + '\n' for line in _evaluation_lines(url, result, detailed)))
+
+def _evaluation_lines(url, result, detailed):
+    """Yield the colored debug output lines for a single evaluated request."""
+    expected_status = result.expected
+    yield colored(f"\n=== Debugging {result.name} ===", "cyan")
+    yield colored(f"URL: {url}", "yellow")
+    yield colored(f"Payload: {result.payload}", "yellow")
+    yield colored(f"Expected status: {expected_status}", "yellow")
+    yield colored("\nSending request...", "blue")
     
-    try:
-        # Send the request
-        print(colored("\nSending request...", "blue"))
-        response = requests.get(
-            url, 
-            params=payload,
-            headers={'User-Agent': 'WAF-Threshold-Test-Debug/1.0'}, 
-            timeout=5
-        )
-        
-        # Get the status code
-        status = response.status_code
-        print(colored(f"Received status code: {status}", "green"))
-        
-        # Check if it matches expected
-        match = status == expected_status
-        match_str = "✓ MATCH" if match else "✗ MISMATCH"
-        match_color = "green" if match else "red"
-        print(colored(f"Status evaluation: {match_str}", match_color))
-        
-        # Show response details
-        print(colored("\nResponse details:", "cyan"))
-        print(colored(f"Status code: {status}", "yellow"))
-        print(colored(f"Response body: {response.text[:100]}...", "yellow") if len(response.text) > 100 else colored(f"Response body: {response.text}", "yellow"))
-        
-        # Show evaluation details
-        print(colored("\nEvaluation details:", "cyan"))
-        print(colored(f"Python expression: response.status_code == {expected_status}", "yellow"))
-        print(colored(f"Evaluation result: {response.status_code} == {expected_status} = {response.status_code == expected_status}", "yellow"))
-        
-        # Boolean check
-        bool_result = bool(response and response.status_code == expected_status)
-        print(colored(f"Boolean check: bool(response and response.status_code == {expected_status}) = {bool_result}", "yellow"))
-        
-        # Return result for summary
-        return {
-            "test_name": test_name,
-            "expected": expected_status,
-            "actual": status,
-            "match": match,
-            "bool_check": bool_result
-        }
-        
-    except requests.exceptions.RequestException as e:
-        print(colored(f"Error sending request: {str(e)}", "red"))
-        return {
-            "test_name": test_name,
-            "error": str(e),
-            "match": False,
-            "bool_check": False
-        }
+    if result.error is not None:
+        yield colored(f"Error sending request: {result.error}", "red")
+        return
+    
+    status = result.actual
+    yield colored(f"Received status code: {status}", "green")
+    
+    # Check if it matches expected
+    match_str = "✓ MATCH" if result.matched else "✗ MISMATCH"
+    match_color = "green" if result.matched else "red"
+    yield colored(f"Status evaluation: {match_str}", match_color)
+    
+    if not detailed:
+        return
+    
+    # Show response details
+    body = result.body
+    yield colored("\nResponse details:", "cyan")
+    yield colored(f"Status code: {status}", "yellow")
+    yield colored(f"Response body: {body[:100]}...", "yellow") if len(body) > 100 else colored(f"Response body: {body}", "yellow")
+    
+    # Show evaluation details
+    yield colored("\nEvaluation details:", "cyan")
+    yield colored(f"Python expression: response.status_code == {expected_status}", "yellow")
+    yield colored(f"Evaluation result: {status} == {expected_status} = {result.matched}", "yellow")
+    
+    # Boolean check
+    yield colored(f"Boolean check: bool(response and response.status_code == {expected_status}) = {result.bool_check}", "yellow")
 
-def run_all_tests(url):
+def run_all_tests(url, detailed=False):
     """Run all the tests from the anomaly threshold test script and debug the results."""
     print(colored("Running all tests and debugging evaluation logic...", "cyan"))
     
-    # Define all test cases
-    test_cases = [
-        {"name": "Test 1 (Low score)", "payload": {"test": "low_score_test"}, "expected": 200},
-        {"name": "Test 2 (Below threshold)", "payload": {"param1": "score2", "param2": "score2"}, "expected": 200},
-        {"name": "Test 3 (Exceed threshold)", "payload": {"param1": "score3", "param2": "score3"}, "expected": 403},
-        {"name": "Test 4 (Block action)", "payload": {"block": "true"}, "expected": 403},
-        {"name": "Test 5a (Increment 1)", "payload": {"increment": "score1"}, "expected": 200},
-        {"name": "Test 5b (Increment 2)", "payload": {"increment": "score2"}, "expected": 200},
-        {"name": "Test 5c (Increment 3)", "payload": {"increment": "score3"}, "expected": 200},
-    ]
+    # Results come back in test order, so they print as if run sequentially
+    results = run_tests(_SESSION, url, TEST_CASES, detailed)
     
-    # Run each test
-    results = []
-    for test in test_cases:
-        result = debug_response_evaluation(url, test["name"], test["payload"], test["expected"])
-        results.append(result)
+    for result in results:
+        print_evaluation(url, result, detailed)
     
     # Show summary
     print(colored("\n=== Test Evaluation Summary ===", "cyan"))
     for result in results:
-        if "error" in result:
-            print(colored(f"{result['test_name']}: Error - {result['error']}", "red"))
+        if result.error is not None:
+            print(colored(f"{result.name}: Error - {result.error}", "red"))
         else:
-            status = "PASS" if result["match"] else "FAIL"
-            color = "green" if result["match"] else "red"
-            print(colored(f"{result['test_name']}: {status} (Expected: {result['expected']}, Actual: {result['actual']})", color))
-            print(colored(f"  Boolean evaluation: {result['bool_check']}", "yellow"))
+            status = "PASS" if result.matched else "FAIL"
+            color = "green" if result.matched else "red"
+            print(colored(_SUMMARY_FMT.format(name=result.name, status=status, expected=result.expected, actual=result.actual), color))
+            print(colored(f"  Boolean evaluation: {result.bool_check}", "yellow"))
     
     # Check for any issues with Tests 3 and 4
-    test3 = next((r for r in results if r["test_name"] == "Test 3 (Exceed threshold)"), None)
-    test4 = next((r for r in results if r["test_name"] == "Test 4 (Block action)"), None)
+    results_by_name = {r.name: r for r in results}
+    test3 = results_by_name.get("Test 3 (Exceed threshold)")
+    test4 = results_by_name.get("Test 4 (Block action)")
     
     if test3 and test4:
-        if test3["match"] and not test3["bool_check"]:
+        if test3.matched and not test3.bool_check:
             print(colored("\nISSUE DETECTED: Test 3 status matches but boolean evaluation fails!", "red"))
             print(colored("This explains why the test incorrectly shows as failed.", "red"))
         
-        if test4["match"] and not test4["bool_check"]:
+        if test4.matched and not test4.bool_check:
             print(colored("\nISSUE DETECTED: Test 4 status matches but boolean evaluation fails!", "red"))
             print(colored("This explains why the test incorrectly shows as failed.", "red"))
 
@@ -126,11 +104,11 @@ def main():
     
     # Check server connectivity
     try:
-        response = requests.get(url, timeout=2)
+        _SESSION.head(url, timeout=(1, 1))
         print(colored(f"Server is reachable at {url}", "green"))
         
         # Run all tests
-        run_all_tests(url)
+        run_all_tests(url, detailed)
         
     except requests.exceptions.RequestException:
         print(colored(f"ERROR: Cannot reach server at {url}", "red"))
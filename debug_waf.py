@@ -5,6 +5,18 @@ import json
 import sys
 import argparse
 from termcolor import colored
+from waf_tests import TEST_CASES, make_session, run_tests
+
+try:
+    import orjson
+
+    def _dumps(obj, pretty):
+        return orjson.dumps(obj, option=orjson.OPT_INDENT_2 if pretty else 0)
+except ImportError:  # optional: faster JSON serialization when available
+    def _dumps(obj, pretty):
+        return json.dumps(obj, indent=2 if pretty else None).encode()
+
+_SESSION = make_session('WAF-Debug-Tool/1.0')
 
 def setup_args():
     parser = argparse.ArgumentParser(description='Debug WAF configuration via Caddy Admin API')
@@ -19,7 +31,7 @@ def setup_args():
 def get_caddy_config(admin_url, config_path):
     """Get the current Caddy configuration from the Admin API."""
     try:
-        response = requests.get(f"{admin_url}{config_path}", timeout=5)
+        response = _SESSION.get(f"{admin_url}{config_path}", timeout=5)
         if response.status_code == 200:
             return response.json()
         else:
@@ -29,6 +41,12 @@ def get_caddy_config(admin_url, config_path):
         print(colored(f"Error connecting to Caddy Admin API: {str(e)}", "red"))
         return None
 
+def _iter_handlers(server):
+    """Yield (route, handler) pairs for every handler in a server's routes."""
+    for route in server.get('routes') or ():
+        for handler in route.get('handle') or ():
+            yield route, handler
+
 def extract_waf_config(config):
     """Extract WAF-related configuration from the Caddy config."""
     if not config:
@@ -37,24 +55,21 @@ def extract_waf_config(config):
     waf_config = {"routes": [], "handlers": [], "thresholds": []}
     
     # Try to find WAF configuration in apps.http.servers
-    if 'apps' in config and 'http' in config['apps'] and 'servers' in config['apps']['http']:
-        for server_name, server in config['apps']['http']['servers'].items():
-            print(colored(f"Examining server: {server_name}", "cyan"))
+    servers = ((config.get('apps') or {}).get('http') or {}).get('servers') or {}
+    for server_name, server in servers.items():
+        print(colored(f"Examining server: {server_name}", "cyan"))
+        
+        for route, handler in _iter_handlers(server):
+            if handler.get('handler') != 'waf':
+                continue
+            print(colored("Found WAF handler in route", "green"))
+            waf_config['routes'].append(route)
+            waf_config['handlers'].append(handler)
             
-            if 'routes' in server:
-                for route in server['routes']:
-                    # Check for WAF in route handlers
-                    if 'handle' in route:
-                        for handler in route['handle']:
-                            if handler.get('handler') == 'waf':
-                                print(colored("Found WAF handler in route", "green"))
-                                waf_config['routes'].append(route)
-                                waf_config['handlers'].append(handler)
-                                
-                                # Check for threshold
-                                if 'anomaly_threshold' in handler:
-                                    print(colored(f"Found anomaly threshold: {handler['anomaly_threshold']}", "green"))
-                                    waf_config['thresholds'].append(handler['anomaly_threshold'])
+            # Check for threshold
+            if 'anomaly_threshold' in handler:
+                print(colored(f"Found anomaly threshold: {handler['anomaly_threshold']}", "green"))
+                waf_config['thresholds'].append(handler['anomaly_threshold'])
     
     if not waf_config['handlers']:
         print(colored("No WAF handlers found in the configuration", "yellow"))
@@ -64,11 +79,11 @@ def extract_waf_config(config):
 def save_config(config, file_path, pretty=False):
     """Save the configuration to a file."""
     try:
-        with open(file_path, 'w') as f:
-            if pretty:
-                json.dump(config, f, indent=2)
-            else:
-                json.dump(config, f)
+        # Serialize before opening so the file isn't held open (or left
+        # truncated) while the config is encoded, then write it in one call
+        payload = _dumps(config, pretty)
+        with open(file_path, 'wb') as f:
+            f.write(payload)
         print(colored(f"Configuration saved to {file_path}", "green"))
     except Exception as e:
         print(colored(f"Error saving configuration: {str(e)}", "red"))
@@ -82,70 +97,45 @@ def test_waf_rules(target_url, waf_config):
     threshold = thresholds[0] if thresholds else 5
     print(colored(f"Using anomaly threshold: {threshold}", "yellow"))
     
-    # Test cases
-    test_cases = [
-        {"name": "Low Score Test", "payload": {"test": "low_score_test"}, "expected_status": 200},
-        {"name": "Below Threshold Test", "payload": {"param1": "score2", "param2": "score2"}, "expected_status": 200},
-        {"name": "Exceed Threshold Test", "payload": {"param1": "score3", "param2": "score3"}, "expected_status": 403},
-        {"name": "Block Action Test", "payload": {"block": "true"}, "expected_status": 403},
-    ]
-    
-    results = []
+    # The first four shared cases cover the low-score, threshold and block rules;
+    # results come back in test order
+    results = run_tests(_SESSION, target_url, TEST_CASES[:4], detailed=True)
     
-    for test_case in test_cases:
-        print(colored(f"\nRunning test: {test_case['name']}", "cyan"))
-        print(colored(f"Payload: {test_case['payload']}", "yellow"))
-        print(colored(f"Expected status: {test_case['expected_status']}", "yellow"))
+    out = []  # output lines, written in one go below
+    for result in results:
+        out.append(colored(f"\nRunning test: {result.name}", "cyan"))
+        out.append(colored(f"Payload: {result.payload}", "yellow"))
+        out.append(colored(f"Expected status: {result.expected}", "yellow"))
         
-        try:
-            response = requests.get(
-                target_url, 
-                params=test_case['payload'],
-                headers={'User-Agent': 'WAF-Debug-Tool/1.0'},
-                timeout=5
-            )
-            
-            status = response.status_code
-            matched = status == test_case['expected_status']
-            color = "green" if matched else "red"
-            
-            print(colored(f"Actual status: {status} - {'✓ MATCH' if matched else '✗ MISMATCH'}", color))
-            print(colored(f"Response: {response.text[:100]}...", "yellow") if len(response.text) > 100 else colored(f"Response: {response.text}", "yellow"))
-            
-            # Store result
-            results.append({
-                "name": test_case['name'],
-                "expected": test_case['expected_status'],
-                "actual": status,
-                "matched": matched
-            })
-            
-        except requests.exceptions.RequestException as e:
-            print(colored(f"Error sending request: {str(e)}", "red"))
-            results.append({
-                "name": test_case['name'],
-                "error": str(e),
-                "matched": False
-            })
+        if result.error is not None:
+            out.append(colored(f"Error sending request: {result.error}", "red"))
+            continue
+        
+        body = result.body
+        color = "green" if result.matched else "red"
+        out.append(colored(f"Actual status: {result.actual} - {'✓ MATCH' if result.matched else '✗ MISMATCH'}", color))
+        out.append(colored(f"Response: {body[:100]}...", "yellow") if len(body) > 100 else colored(f"Response: {body}", "yellow"))
     
     # Summary
-    print(colored("\nTest Results Summary:", "cyan"))
-    passes = sum(1 for r in results if r.get('matched', False))
+    out.append(colored("\nTest Results Summary:", "cyan"))
+    passes = sum(1 for r in results if r.matched)
     failures = len(results) - passes
     
-    print(colored(f"Total Tests: {len(results)}", "yellow"))
-    print(colored(f"Passes: {passes}", "green"))
-    print(colored(f"Failures: {failures}", "red" if failures > 0 else "green"))
+    out.append(colored(f"Total Tests: {len(results)}", "yellow"))
+    out.append(colored(f"Passes: {passes}", "green"))
+    out.append(colored(f"Failures: {failures}", "red" if failures > 0 else "green"))
     
     # Detailed results
-    print(colored("\nDetailed Results:", "cyan"))
+    out.append(colored("\nDetailed Results:", "cyan"))
     for result in results:
-        status = "PASS" if result.get('matched', False) else "FAIL"
-        color = "green" if result.get('matched', False) else "red"
-        if 'error' in result:
-            print(colored(f"{result['name']}: {status} - Error: {result['error']}", color))
+        status = "PASS" if result.matched else "FAIL"
+        color = "green" if result.matched else "red"
+        if result.error is not None:
+            out.append(colored(f"{result.name}: {status} - Error: {result.error}", color))
         else:
-            print(colored(f"{result['name']}: {status} - Expected: {result['expected']}, Actual: {result['actual']}", color))
+            out.append(colored(f"{result.name}: {status} - Expected: {result.expected}, Actual: {result.actual}", color))
+    
+    sys.stdout.write(''.join(line + '\n' for line in out))
     
     return results
 
@@ -1,6 +1,10 @@
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 import re
 import ipaddress
+import socket
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from tqdm import tqdm
 
 # List of blocklist URLs and expected line formats
@@ -15,93 +19,184 @@ blocklist_sources = {
 
 # Tor Exit Node Source
 tor_exit_nodes_url = "https://check.torproject.org/exit-addresses"
-
-
-def extract_ips(source_name, url):
-    """Fetches data from the given URL and extracts IP addresses in CIDR format."""
-    ips = set()
+# Lines carrying an exit address look like "ExitAddress <ip> <timestamp>"
+TOR_EXIT_PREFIX = b"ExitAddress "
+
+
+# A lone IPv4/IPv6 address or CIDR on a line; comments and other lines never match
+IP_LINE_RE = re.compile(rb'[ \t]*([0-9A-Fa-f:.]+(?:/[0-9]+)?)[ \t\r]*')
+
+# Bound once so the per-line parsing does not repeat the module attribute lookups
+_ip_network = ipaddress.ip_network
+_inet_pton = socket.inet_pton
+_inet_ntop = socket.inet_ntop
+_from_bytes = int.from_bytes
+_AF_INET = socket.AF_INET
+_AF_INET6 = socket.AF_INET6
+
+
+def parse_network(token):
+    """Returns an IP address or network string as a (version, network int, prefix length) key, or None if it is invalid."""
+    # MODIFIED: Preserve CIDR notation if it already exists
+    if "/" in token:
+        try:
+            # Validate it's a real network
+            net = _ip_network(token, strict=False)
+        except ValueError:
+            return None
+        return (net.version, int(net.network_address), net.prefixlen)
+
+    # Single IPs are validated in C by inet_pton, which is as strict as
+    # ipaddress, and converted to integers without building objects.
+    # Only IPv6 addresses contain ':', so each token needs a single check.
+    if ":" in token:
+        family, version, prefixlen = _AF_INET6, 6, 128
+    elif "." in token:
+        family, version, prefixlen = _AF_INET, 4, 32
+    else:
+        return None
+    try:
+        packed = _inet_pton(family, token)
+    except (OSError, ValueError): # ValueError: embedded NUL character
+        return None
+    return (version, _from_bytes(packed, "big"), prefixlen)
+
+
+def collapse_networks(networks, bits):
+    """Yields the minimal (network int, prefix length) cover of the given networks in numeric order.
+
+    Same result as ipaddress.collapse_addresses, but on plain integers: the
+    networks are merged as address ranges and each range is split back into
+    the largest aligned CIDR blocks.
+    """
+    cur_start = cur_end = None
+    for start, prefixlen in sorted(networks):
+        end = start + (1 << (bits - prefixlen))
+        if cur_end is not None and start <= cur_end:
+            # Overlapping or adjacent: extend the current range
+            if end > cur_end:
+                cur_end = end
+            continue
+        if cur_end is not None:
+            yield from _split_range(cur_start, cur_end, bits)
+        cur_start, cur_end = start, end
+    if cur_end is not None:
+        yield from _split_range(cur_start, cur_end, bits)
+
+
+def _split_range(start, end, bits):
+    """Yields the largest aligned (network int, prefix length) blocks covering [start, end)."""
+    if end - start == 1:
+        # The common case: a lone address that touches no other entry
+        yield start, bits
+        return
+    while start < end:
+        # Largest block aligned at start that still fits in the range
+        size = 1 << ((end - start).bit_length() - 1)
+        if start and start & -start < size:
+            size = start & -start
+        yield start, bits - size.bit_length() + 1
+        start += size
+
+
+def format_network(version, start, prefixlen):
+    """Returns the CIDR string of a (version, network int, prefix length) key."""
+    if version == 4:
+        return f"{_inet_ntop(_AF_INET, start.to_bytes(4, 'big'))}/{prefixlen}"
+    # ipaddress keeps the exact IPv6 text form of earlier releases (e.g. for IPv4-mapped addresses)
+    return f"{ipaddress.IPv6Address(start)}/{prefixlen}"
+
+
+def extract_ips(session, source_name, url):
+    """Fetches data from the given URL and yields the IP addresses/networks as parse_network keys."""
+    fullmatch = IP_LINE_RE.fullmatch
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        content = response.text
+        # Stream the body and parse it as it downloads, instead of holding
+        # the whole list (and a split copy of it) in memory
+        with session.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            for raw in response.iter_lines(chunk_size=65536):
+                match = fullmatch(raw)
+                if match is None:
+                    continue
+                network = parse_network(match.group(1).decode("ascii"))
+                if network is not None:
+                    yield network
     except requests.exceptions.RequestException as e:
         print(f"Error fetching {source_name} from {url}: {e}")
-        return ips
 
-    for line in content.splitlines():
-        line = line.strip()
-        if not line or line.startswith("#") or line.startswith(";"):
-            continue
 
-        # MODIFIED: Preserve CIDR notation if it already exists
-        if "/" in line:
-            try:
-                # Validate it's a real network and add it
-                net = ipaddress.ip_network(line, strict=False)
-                ips.add(net.with_prefixlen)
-            except ValueError:
-                continue
-        else:
-            # MODIFIED: Convert single IPs to CIDR notation
-            try:
-                ip_obj = ipaddress.ip_address(line)
-                if ip_obj.version == 4:
-                    ips.add(f"{line}/32")
-                else:
-                    ips.add(f"{line}/128")
-            except ValueError:
-                continue
-    return ips
-
-
-def extract_tor_exit_nodes(url):
-    """Fetches Tor exit node IPs and returns them in CIDR format."""
-    ips = set()
+def extract_tor_exit_nodes(session, url):
+    """Fetches Tor exit node IPs and yields them as parse_network keys."""
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
-        content = response.text
+        with session.get(url, timeout=10, stream=True) as response:
+            response.raise_for_status()
+            # Parse the raw bytes and decode only the address token
+            for line in response.iter_lines(chunk_size=65536):
+                if not line.startswith(TOR_EXIT_PREFIX):
+                    continue
+                # Only the address after the prefix is needed, not the timestamp
+                ip_bytes = line[len(TOR_EXIT_PREFIX):].partition(b" ")[0].strip()
+                # MODIFIED: Convert single IPs to CIDR notation
+                if b"/" not in ip_bytes:
+                    # Non-ASCII bytes become U+FFFD; parse_network rejects those and any other invalid token
+                    network = parse_network(ip_bytes.decode("ascii", "replace"))
+                    if network is not None:
+                        yield network
     except requests.exceptions.RequestException as e:
         print(f"Error fetching Tor exit nodes from {url}: {e}")
-        return ips
 
-    for line in content.splitlines():
-        if line.startswith("ExitAddress"):
-            parts = line.split(" ")
-            if len(parts) > 1:
-                ip_str = parts[1].strip()
-                # MODIFIED: Convert single IPs to CIDR notation
-                try:
-                    ip_obj = ipaddress.ip_address(ip_str)
-                    if ip_obj.version == 4:
-                        ips.add(f"{ip_str}/32")
-                    else:
-                        ips.add(f"{ip_str}/128")
-                except ValueError:
-                    continue
-    return ips
+
+def make_session():
+    """Creates a session whose pooled keep-alive connections are shared by all fetches.
+
+    Only failed connects are retried; a read timeout is not retried.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(pool_connections=16, pool_maxsize=32, max_retries=Retry(total=2, read=False, backoff_factor=0.3))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
 
 
 def main():
     combined_ips = set()
-    for source_name, url in tqdm(blocklist_sources.items(), desc="Processing Blocklists"):
-        print(f"Processing {source_name} from {url}")
-        ips = extract_ips(source_name, url)
-        print(f"  Found {len(ips)} IPs/CIDRs in {source_name}")
-        combined_ips.update(ips)
-
-    # Tor Exit Node Processing
-    tor_exit_ips = extract_tor_exit_nodes(tor_exit_nodes_url)
-    print(f"Total Tor exit node IPs/CIDRs: {len(tor_exit_ips)}")
+    # The sources are independent and I/O-bound, so fetch them all at once
+    # (including the Tor list) and merge results as they arrive. Each worker
+    # drains its generator into a plain list so the download and parsing stay
+    # off the main thread, and duplicates are only hashed once, in combined_ips.
+    with make_session() as session, ThreadPoolExecutor(max_workers=8) as executor:
+        futures = {}
+        for source_name, url in blocklist_sources.items():
+            print(f"Processing {source_name} from {url}")
+            futures[executor.submit(list, extract_ips(session, source_name, url))] = source_name
+        tor_future = executor.submit(list, extract_tor_exit_nodes(session, tor_exit_nodes_url))
+
+        for future in tqdm(as_completed(futures), total=len(futures), desc="Processing Blocklists"):
+            ips = future.result()
+            len_before = len(combined_ips)
+            combined_ips.update(ips)
+            print(f"  Found {len(ips)} IPs/CIDRs in {futures[future]} ({len(combined_ips) - len_before} new)")
+
+        # Tor Exit Node Processing
+        tor_exit_ips = tor_future.result()
+    len_before = len(combined_ips)
     combined_ips.update(tor_exit_ips)
+    print(f"Total Tor exit node IPs/CIDRs: {len(tor_exit_ips)} ({len(combined_ips) - len_before} new)")
 
     print(f"Total Unique IPs/CIDRs after deduplication: {len(combined_ips)}")
 
-    # MODIFIED: The final write loop is simpler. The sorting key is removed as sorting CIDRs as integers is incorrect.
-    # A simple lexicographical sort is sufficient here.
+    # Collapse overlapping and adjacent networks into the minimal covering set,
+    # per IP version and numerically sorted. The entries are already integers,
+    # so no address is parsed a second time.
+    nets_v4 = [(start, prefixlen) for version, start, prefixlen in combined_ips if version == 4]
+    nets_v6 = [(start, prefixlen) for version, start, prefixlen in combined_ips if version == 6]
+    collapsed = [(4, start, prefixlen) for start, prefixlen in collapse_networks(nets_v4, 32)]
+    collapsed += [(6, start, prefixlen) for start, prefixlen in collapse_networks(nets_v6, 128)]
+    print(f"Total IPs/CIDRs after collapsing overlapping ranges: {len(collapsed)}")
+
     with open("ip_blacklist.txt", "w") as f:
-        for ip_cidr in sorted(list(combined_ips)):
-            f.write(f"{ip_cidr}\n")
+        f.write("".join(f"{format_network(*net)}\n" for net in collapsed))
 
     print("IP blacklist saved to ip_blacklist.txt")
 
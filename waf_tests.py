@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""Anomaly threshold test cases and request runner shared by the WAF debug scripts."""
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
+from typing import NamedTuple, Optional
+
+class TestCase(NamedTuple):
+    name: str
+    payload: dict
+    expected: int
+
+class Result(NamedTuple):
+    name: str
+    payload: dict
+    expected: int
+    actual: Optional[int] = None
+    matched: bool = False
+    bool_check: bool = False
+    body: str = ''
+    error: Optional[str] = None
+
+# Test cases mirroring the anomaly threshold test script
+TEST_CASES = (
+    TestCase("Test 1 (Low score)", {"test": "low_score_test"}, 200),
+    TestCase("Test 2 (Below threshold)", {"param1": "score2", "param2": "score2"}, 200),
+    TestCase("Test 3 (Exceed threshold)", {"param1": "score3", "param2": "score3"}, 403),
+    TestCase("Test 4 (Block action)", {"block": "true"}, 403),
+    TestCase("Test 5a (Increment 1)", {"increment": "score1"}, 200),
+    TestCase("Test 5b (Increment 2)", {"increment": "score2"}, 200),
+    TestCase("Test 5c (Increment 3)", {"increment": "score3"}, 200),
+)
+
+def make_session(user_agent):
+    """Create a session with one connection pool sized for the concurrent test requests.
+
+    Automatic retries are disabled so every status code is reported as received.
+    """
+    session = requests.Session()
+    session.headers['User-Agent'] = user_agent
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=Retry(total=0))
+    session.mount('http://', adapter)
+    session.mount('https://', adapter)
+    return session
+
+def run_test(session, url, case, detailed=False):
+    """Send a single test request and return its result; the body is kept only if detailed."""
+    try:
+        response = session.get(url, params=case.payload, timeout=5)
+    except requests.exceptions.RequestException as e:
+        return Result(case.name, case.payload, case.expected, error=str(e))
+
+    status = response.status_code
+    return Result(
+        case.name,
+        case.payload,
+        case.expected,
+        actual=status,
+        matched=status == case.expected,
+        bool_check=bool(response and status == case.expected),
+        body=response.text if detailed else ''
+    )
+
+def run_tests(session, url, cases, detailed=False):
+    """Send the independent test requests concurrently and return the results in case order."""
+    with ThreadPoolExecutor(max_workers=len(cases)) as executor:
+        return list(executor.map(lambda case: run_test(session, url, case, detailed), cases))